@@ -1,6 +1,6 @@
 import random
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from collections import defaultdict
 
 try:
     from pypokerengine.api.game import setup_config, start_poker
@@ -8,163 +8,466 @@ try:
 except ImportError:
     raise ImportError("PyPokerEngine is not installed. Please install via 'pip install pypokerengine'")
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Numba is optional: without it the fixed sub-tree is trained by the
+    # scalar _iter_cfr, and _cfr_iterate runs as plain Python
+    NUMBA_AVAILABLE = False
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
 ############################################
 # 1) CFR Data Structures + Global Dictionary
 ############################################
 
-class CFRNode:
+ACTIONS = ("fold", "call", "raise")
+FOLD_IDX, CALL_IDX, RAISE_IDX = range(len(ACTIONS))
+# PyPokerEngine action name -> ACTIONS id ("check" plays like "call")
+VALID_ACTION_IDX = {"fold": FOLD_IDX, "call": CALL_IDX, "check": CALL_IDX, "raise": RAISE_IDX}
+# Strategy used for info sets that were never trained
+DEFAULT_STRATEGY = np.array([0.33, 0.34, 0.33])
+UNIFORM_STRATEGY = np.full(len(ACTIONS), 1.0/len(ACTIONS))
+# Shared constants: never mutate them in place
+DEFAULT_STRATEGY.flags.writeable = False
+UNIFORM_STRATEGY.flags.writeable = False
+
+RNG = np.random.default_rng()
+UNIFORM_BUFFER_SIZE = 1024
+OPP_ACTIONS = ("fold_opp", "call_opp", "raise_opp")
+
+# CFR info sets are stored struct-of-arrays style: row i of REGRETS and
+# STRAT_SUMS holds the regret / strategy sums of the info set mapped to i in
+# NODE_INDEX, and VISITS[i] how many CFR iterations it has been trained for.
+# Columns are action ids (see ACTIONS / OPP_ACTIONS).
+#
+# Storage precision of the tables. CFR tolerates low precision well. The
+# compiled kernel adds every node's update straight into these rows, so
+# regret / strategy sums accumulate at this precision; only the scalar
+# _iter_cfr fallback accumulates in float64 and writes back once per call.
+CFR_DTYPE = np.float32
+INITIAL_CAP = 1024
+REGRETS = np.zeros((INITIAL_CAP, len(ACTIONS)), dtype=CFR_DTYPE)
+STRAT_SUMS = np.zeros((INITIAL_CAP, len(ACTIONS)), dtype=CFR_DTYPE)
+VISITS = np.zeros(INITIAL_CAP, dtype=np.int64)
+NODE_INDEX = {}
+N_NODES = 0
+
+def reset_cfr_table():
+    global REGRETS, STRAT_SUMS, VISITS, N_NODES
+    REGRETS = np.zeros((INITIAL_CAP, len(ACTIONS)), dtype=CFR_DTYPE)
+    STRAT_SUMS = np.zeros((INITIAL_CAP, len(ACTIONS)), dtype=CFR_DTYPE)
+    VISITS = np.zeros(INITIAL_CAP, dtype=np.int64)
+    NODE_INDEX.clear()
+    N_NODES = 0
+
+def _grow_cfr_table():
     """
-    A node storing regret sums and strategy sums for a particular information set (info_key).
+    Doubles the capacity of the regret / strategy tables.
     """
-    def __init__(self, info_key, actions):
-        self.info_key = info_key
-        self.actions = actions
-        self.regret_sums = defaultdict(float)
-        self.strategy_sums = defaultdict(float)
-
-    def get_strategy(self, realization_weight):
-        """
-        Convert regret sums into a probability distribution over actions,
-        then update strategy_sums for average-strategy tracking.
-        """
-        positive_regrets = {a: max(0.0, self.regret_sums[a]) for a in self.actions}
-        sum_reg = sum(positive_regrets.values())
-
-        if sum_reg > 1e-9:
-            strategy = {a: positive_regrets[a]/sum_reg for a in self.actions}
-        else:
-            strategy = {a: 1.0/len(self.actions) for a in self.actions}
+    global REGRETS, STRAT_SUMS, VISITS
+    REGRETS = np.vstack([REGRETS, np.zeros_like(REGRETS)])
+    STRAT_SUMS = np.vstack([STRAT_SUMS, np.zeros_like(STRAT_SUMS)])
+    VISITS = np.concatenate([VISITS, np.zeros_like(VISITS)])
 
-        for a in strategy:
-            self.strategy_sums[a] += strategy[a] * realization_weight
-        return strategy
-
-    def get_average_strategy(self):
-        total = sum(self.strategy_sums.values())
-        if total < 1e-9:
-            return {a: 1.0/len(self.actions) for a in self.actions}
-        return {a: self.strategy_sums[a]/total for a in self.actions}
-
-
-class TreeNode:
+def get_or_create_cfr_node(info_key):
     """
-    Toy decision tree node with:
-      - current_player: index (0 or 1) or None if terminal
-      - info_key: identifies the situation (e.g. (hole_str, board_str, pot_size))
-      - children: dict(action->TreeNode)
-      - terminal_payoff: e.g. [p0_payoff, p1_payoff] if terminal
+    Returns the table row of info_key, allocating one if it is new.
     """
-    def __init__(self, current_player, info_key, children=None, terminal_payoff=None):
-        self.current_player = current_player
-        self.info_key = info_key
-        self.children = children if children else {}
-        self.terminal_payoff = terminal_payoff
-
-    def is_terminal(self):
-        return self.terminal_payoff is not None
-
-# A global dictionary for storing CFR info sets
-cfr_nodes = {}
-
-def get_or_create_cfr_node(info_key, actions):
-    if info_key not in cfr_nodes:
-        cfr_nodes[info_key] = CFRNode(info_key, actions)
-    return cfr_nodes[info_key]
+    global N_NODES
+    node_id = NODE_INDEX.get(info_key)
+    if node_id is None:
+        if N_NODES == len(REGRETS):
+            _grow_cfr_table()
+        node_id = N_NODES
+        NODE_INDEX[info_key] = node_id
+        N_NODES += 1
+    return node_id
+
+def get_average_strategy(node_id):
+    s0, s1, s2 = STRAT_SUMS[node_id].tolist()
+    total = s0 + s1 + s2
+    if total < 1e-9:
+        return UNIFORM_STRATEGY
+    return np.array((s0/total, s1/total, s2/total))
 
 ############################################
 # 2) Building a Small Decision Tree
 ############################################
 
-def build_subtree(round_state, player_view, known_hole_cards, known_board, pot_size):
+# The sub-tree has a fixed shape:
+#   hero: "fold" -> leaf 0
+#         "call" / "raise" -> opponent node
+#   opp:  "fold_opp" -> leaf 1, "call_opp" -> leaf 2, "raise_opp" -> leaf 3
+# Leaf payoffs are [p0_payoff, p1_payoff] with the hero sitting in seat 0.
+LEAF_PAYOFFS_P0 = np.array([
+    [-10.0, 0.0],   # fold      => hero loses 10
+    [25.0, 0.0],    # fold_opp  => hero wins 25
+    [5.0, -5.0],    # call_opp
+    [-15.0, 15.0],  # raise_opp
+])
+# Same payoffs when the hero sits in seat 1
+LEAF_PAYOFFS_P1 = LEAF_PAYOFFS_P0[:, ::-1].copy()
+LEAF_PAYOFFS = (LEAF_PAYOFFS_P0, LEAF_PAYOFFS_P1)
+
+# Decision nodes are (role, slot, children), leaves are leaf ids into
+# LEAF_PAYOFFS. `slot` indexes the sub-tree's info sets in the order
+# build_subtree returns their keys; both opponent nodes share slot 1.
+HERO, OPP = 0, 1
+_OPP_NODE = (OPP, 1, [1, 2, 3])
+SUBTREE_TEMPLATE = (HERO, 0, [0, _OPP_NODE, _OPP_NODE])
+
+def flatten_tree(root, player_view):
     """
-    Creates a minimal tree with:
-      "fold", "call", "raise"
-    plus a tiny "opponent node" if we call/raise.
+    Lays a template tree out as parallel arrays in breadth-first order, so
+    every node's children are contiguous (first_child .. first_child +
+    n_children) and come after their parent:
+      - player[i]: seat to act, or -1 for a leaf
+      - slot[i]: info set slot of a decision node, or -1 for a leaf
+      - first_child[i], n_children[i]: children of a decision node
+      - payoffs[b, i]: [p0_payoff, p1_payoff] of a leaf under chance sample b;
+        the template is deterministic, so there is a single sample (b = 0)
+    Every node of an info set slot must have the same number of children, at
+    most len(ACTIONS) (the width of the CFR tables).
     """
-    hole_str = "-".join(sorted([c[0] for c in known_hole_cards]))
-    board_str = "-".join([c[0] for c in known_board])
-    info_key = (hole_str, board_str, pot_size)
-
-    actions = ["fold", "call", "raise"]
-    root_node = TreeNode(current_player=player_view, info_key=info_key)
-
-    # Fold => hero loses 10
-    fold_payoff = [0, 0]
-    fold_payoff[player_view] = -10
-    fold_child = TreeNode(None, None, terminal_payoff=fold_payoff)
-
-    # Opponent node
-    opp_view = 1 - player_view
-    opp_info_key = ("opp_turn", pot_size)
-    opp_node = TreeNode(current_player=opp_view, info_key=opp_info_key)
-
-    # Opponent actions => terminal payoffs
-    fold_opp_payoff = [0, 0]
-    fold_opp_payoff[player_view] = +25
-    fold_opp_child = TreeNode(None, None, terminal_payoff=fold_opp_payoff)
+    order = [root]
+    player, slot, first_child, n_children, payoffs = [], [], [], [], []
+    slot_actions = {}
+    i = 0
+    while i < len(order):
+        node = order[i]
+        if isinstance(node, tuple):
+            role, node_slot, children = node
+            if not 1 <= len(children) <= len(ACTIONS):
+                raise ValueError(
+                    f"Decision node in slot {node_slot} has {len(children)} children; "
+                    f"expected 1 to {len(ACTIONS)}"
+                )
+            if slot_actions.setdefault(node_slot, len(children)) != len(children):
+                raise ValueError(f"Nodes of slot {node_slot} have different numbers of children")
+            player.append(player_view if role == HERO else 1 - player_view)
+            slot.append(node_slot)
+            first_child.append(len(order))
+            n_children.append(len(children))
+            payoffs.append((0.0, 0.0))
+            order.extend(children)
+        else:
+            player.append(-1)
+            slot.append(-1)
+            first_child.append(-1)
+            n_children.append(0)
+            payoffs.append(LEAF_PAYOFFS[player_view][node])
+        i += 1
+
+    return (
+        np.array(player, dtype=np.int64), np.array(slot, dtype=np.int64),
+        np.array(first_child, dtype=np.int64), np.array(n_children, dtype=np.int64),
+        np.array([payoffs], dtype=np.float64),
+    )
 
-    call_opp_payoff = [0, 0]
-    call_opp_payoff[player_view] = +5
-    call_opp_payoff[opp_view] = -5
-    call_opp_child = TreeNode(None, None, terminal_payoff=call_opp_payoff)
+# The flattened sub-tree for each hero seat, and the root reach of its
+# single chance sample
+FLAT_SUBTREES = tuple(flatten_tree(SUBTREE_TEMPLATE, pv) for pv in (0, 1))
+ROOT_REACH = np.ones((1, 2))
 
-    raise_opp_payoff = [0, 0]
-    raise_opp_payoff[player_view] = -15
-    raise_opp_payoff[opp_view] = +15
-    raise_opp_child = TreeNode(None, None, terminal_payoff=raise_opp_payoff)
+# PyPokerEngine card strings: suit + rank, e.g. "SA", "H9"
+SUITS = "CDHS"
+DECK = [suit + rank for suit in SUITS for rank in "23456789TJQKA"]
+# The info key abstracts each card by its first character (the suit) as a
+# small int; looked up per card string to skip the slicing
+CARD_IDX = {card: SUITS.index(card[0]) for card in DECK}
 
-    # Link them
-    opp_node.children["fold_opp"] = fold_opp_child
-    opp_node.children["call_opp"] = call_opp_child
-    opp_node.children["raise_opp"] = raise_opp_child
+def _pack_cards(card_ids):
+    """
+    Packs card ids into one int: base 5 with digits 1..4, so the number of
+    cards is implied and no two sequences collide.
+    """
+    code = 0
+    for card_id in card_ids:
+        code = code * 5 + card_id + 1
+    return code
 
-    root_node.children["fold"] = fold_child
-    root_node.children["call"] = opp_node
-    root_node.children["raise"] = opp_node
+def make_info_key(known_hole_cards, known_board, pot_size):
+    """
+    Info set key for the hero's decision: (hole_code, board_code, pot_size),
+    all small ints. Hole cards are order-independent, the board keeps its
+    dealing order.
+    """
+    hole_code = _pack_cards(sorted([CARD_IDX[c] for c in known_hole_cards]))
+    board_code = _pack_cards([CARD_IDX[c] for c in known_board])
+    return (hole_code, board_code, pot_size)
 
-    return root_node
+def build_subtree(player_view, info_key, pot_size):
+    """
+    Returns the info sets of the minimal tree:
+      "fold", "call", "raise"
+    plus a tiny "opponent node" if we call/raise.
+    The topology and payoffs are the constant template above, so only the keys
+    and the hero's seat change between decisions.
+    """
+    opp_info_key = ("opp_turn", pot_size)
+    return info_key, opp_info_key, player_view
 
 ############################################
-# 3) CFR Recursion on the Sub-Tree
+# 3) CFR Pass on the Sub-Tree
 ############################################
 
-def cfr_tree(node, reach_probs):
+# Iterations per decision, and the reduced count once an info set has been
+# trained for CONVERGED_VISITS iterations (e.g. by pretrain_cfr)
+CFR_ITERATIONS = 50
+CONVERGED_VISITS = 200 * CFR_ITERATIONS
+CONVERGED_ITERATIONS = 5
+
+@njit(cache=True)
+def _regret_matching(regrets, out, n_actions):
     """
-    Forward/backward pass for CFR.
-    Returns payoff array, e.g. [u0,u1].
+    Writes the regret-matching strategy over the first `n_actions` entries of
+    `regrets` into `out`.
     """
-    if node.is_terminal():
-        return node.terminal_payoff
-
-    cp = node.current_player
-    info_key = node.info_key
-    actions = list(node.children.keys())
-
-    cfr_node = get_or_create_cfr_node(info_key, actions)
-    strategy = cfr_node.get_strategy(reach_probs[cp])
-
-    action_utils = {}
-    node_util = np.zeros(2)
-    for a in actions:
-        child = node.children[a]
-        next_reach = reach_probs[:]
-        next_reach[cp] *= strategy[a]
-
-        util = cfr_tree(child, next_reach)
-        action_utils[a] = util
-        node_util += strategy[a] * np.array(util)
+    sum_reg = 0.0
+    for k in range(n_actions):
+        out[k] = max(regrets[k], 0.0)
+        sum_reg += out[k]
+    if sum_reg > 1e-9:
+        for k in range(n_actions):
+            out[k] /= sum_reg
+    else:
+        for k in range(n_actions):
+            out[k] = 1.0 / n_actions
+
+@njit(cache=True, nogil=True)
+def _cfr_iterate(regrets, strat_sums, rows, player, slot, first_child, n_children,
+                 payoffs, root_reach, n):
+    """
+    Runs `n` CFR iterations over a flattened tree (see flatten_tree), updating
+    the table rows `rows[slot]` of REGRETS / STRAT_SUMS in place. Releases the
+    GIL, so sub-trees that share no rows can be trained from several threads.
+    Each slot uses as many table columns as its nodes have children.
+
+    The pass is batched over B chance samples (e.g. sampled opponent hands for
+    MCCFR): payoffs is (B, n_nodes, 2) and root_reach is (B, 2). Every sample
+    shares the info sets, so one strategy per slot is used across the batch
+    and regrets / strategy weights sum over it.
+
+    Each iteration is a forward pass filling reach probabilities and a
+    backward pass computing node values. Regrets are weighted by the
+    counterfactual reach (the other player's), average-strategy sums by the
+    acting player's own reach, both summed over every node of the info set.
+    """
+    n_nodes = player.shape[0]
+    n_slots = rows.shape[0]
+    n_batch = root_reach.shape[0]
+    n_actions = np.zeros(n_slots, dtype=np.int64)
+    for i in range(n_nodes):
+        if player[i] >= 0:
+            n_actions[slot[i]] = n_children[i]
+    strategy = np.zeros((n_slots, regrets.shape[1]))
+    weight = np.empty(n_slots)
+    # Per-sample scratch, reused across the batch: regrets are only read at
+    # the start of an iteration, so each sample adds its share directly
+    reach = np.empty((n_nodes, 2))
+    values = np.empty((n_nodes, 2))
+
+    for _ in range(n):
+        for sl in range(n_slots):
+            _regret_matching(regrets[rows[sl]], strategy[sl], n_actions[sl])
+            weight[sl] = 0.0
+
+        for b in range(n_batch):
+            # Forward pass: parents come before their children
+            reach[0, 0] = root_reach[b, 0]
+            reach[0, 1] = root_reach[b, 1]
+            for i in range(n_nodes):
+                p = player[i]
+                if p < 0:
+                    continue
+                sl = slot[i]
+                weight[sl] += reach[i, p]
+                for k in range(n_children[i]):
+                    c = first_child[i] + k
+                    reach[c, 0] = reach[i, 0]
+                    reach[c, 1] = reach[i, 1]
+                    reach[c, p] *= strategy[sl, k]
+
+            # Backward pass: children come after their parents
+            for i in range(n_nodes - 1, -1, -1):
+                p = player[i]
+                if p < 0:
+                    values[i, 0] = payoffs[b, i, 0]
+                    values[i, 1] = payoffs[b, i, 1]
+                    continue
+                sl = slot[i]
+                u0 = 0.0
+                u1 = 0.0
+                for k in range(n_children[i]):
+                    c = first_child[i] + k
+                    u0 += strategy[sl, k] * values[c, 0]
+                    u1 += strategy[sl, k] * values[c, 1]
+                values[i, 0] = u0
+                values[i, 1] = u1
+
+                # Regret update
+                row = rows[sl]
+                cf_reach = reach[i, 1 - p]
+                for k in range(n_children[i]):
+                    c = first_child[i] + k
+                    regrets[row, k] += cf_reach * (values[c, p] - values[i, p])
+
+        for sl in range(n_slots):
+            row = rows[sl]
+            for k in range(n_actions[sl]):
+                strat_sums[row, k] += strategy[sl, k] * weight[sl]
+
+def _scalar_payoffs(player_view, player):
+    """
+    `player`'s payoffs as nested (hero action, opp action) tuples of floats.
+    The fold row is constant since the opponent never gets to act.
+    """
+    leaves = LEAF_PAYOFFS[player_view][:, player].tolist()
+    fold_row = (leaves[0],) * 3
+    opp_row = tuple(leaves[1:4])
+    return (fold_row, opp_row, opp_row)
 
-    # Regret update
-    cp_util = node_util[cp]
-    for a in actions:
-        r = action_utils[a][cp] - cp_util
-        cfr_node.regret_sums[a] += r * reach_probs[cp]
+# Per-seat scalar payoff matrices for _iter_cfr
+SCALAR_HERO_PAYOFFS = tuple(_scalar_payoffs(pv, pv) for pv in (0, 1))
+SCALAR_OPP_PAYOFFS = tuple(_scalar_payoffs(pv, 1 - pv) for pv in (0, 1))
 
-    return node_util
+def _iter_cfr(regrets_h, sums_h, regrets_o, sums_o, payoff_hero_mat, payoff_opp_mat, n):
+    """
+    Straight-line CFR for the fixed sub-tree on Python floats, used when Numba
+    is missing. At length 3 the work is interpreter dispatch, not arithmetic,
+    and plain floats are cheaper than numpy calls there. Matches _cfr_iterate
+    on the template; takes the four table rows as lists and returns them.
+    """
+    rh0, rh1, rh2 = regrets_h
+    sh0, sh1, sh2 = sums_h
+    ro0, ro1, ro2 = regrets_o
+    so0, so1, so2 = sums_o
+    (h00, h01, h02), (h10, h11, h12), (h20, h21, h22) = payoff_hero_mat
+    (o00, o01, o02), (o10, o11, o12), (o20, o21, o22) = payoff_opp_mat
+
+    for _ in range(n):
+        # Regret matching
+        p0, p1, p2 = max(rh0, 0.0), max(rh1, 0.0), max(rh2, 0.0)
+        total = p0 + p1 + p2
+        if total > 1e-9:
+            hs0, hs1, hs2 = p0/total, p1/total, p2/total
+        else:
+            hs0 = hs1 = hs2 = 1.0/3.0
+        p0, p1, p2 = max(ro0, 0.0), max(ro1, 0.0), max(ro2, 0.0)
+        total = p0 + p1 + p2
+        if total > 1e-9:
+            os0, os1, os2 = p0/total, p1/total, p2/total
+        else:
+            os0 = os1 = os2 = 1.0/3.0
+
+        # Hero action utilities (H @ os) and the opponent's reach-weighted
+        # ones (O.T @ hs); the constant fold row cancels in the regrets
+        u0 = h00*os0 + h01*os1 + h02*os2
+        u1 = h10*os0 + h11*os1 + h12*os2
+        u2 = h20*os0 + h21*os1 + h22*os2
+        v0 = o00*hs0 + o10*hs1 + o20*hs2
+        v1 = o01*hs0 + o11*hs1 + o21*hs2
+        v2 = o02*hs0 + o12*hs1 + o22*hs2
+        hero_util = hs0*u0 + hs1*u1 + hs2*u2
+        opp_util = os0*v0 + os1*v1 + os2*v2
+
+        # Regret + average-strategy update
+        rh0 += u0 - hero_util
+        rh1 += u1 - hero_util
+        rh2 += u2 - hero_util
+        ro0 += v0 - opp_util
+        ro1 += v1 - opp_util
+        ro2 += v2 - opp_util
+        sh0 += hs0
+        sh1 += hs1
+        sh2 += hs2
+        # The opponent acts at two nodes (after call / raise), each with
+        # its own reach 1.0
+        so0 += 2.0 * os0
+        so1 += 2.0 * os1
+        so2 += 2.0 * os2
+
+    return [rh0, rh1, rh2], [sh0, sh1, sh2], [ro0, ro1, ro2], [so0, so1, so2]
+
+def _train_rows(regrets, strat_sums, rows, player_view, iterations):
+    """
+    Trains the template sub-tree on table rows `rows` (hero, opp): with the
+    compiled kernel if Numba is available, otherwise with _iter_cfr.
+    """
+    if NUMBA_AVAILABLE:
+        _cfr_iterate(regrets, strat_sums, rows, *FLAT_SUBTREES[player_view], ROOT_REACH, iterations)
+        return
+    hero_id, opp_id = rows.tolist()
+    rh, sh, ro, so = _iter_cfr(
+        regrets[hero_id].tolist(), strat_sums[hero_id].tolist(),
+        regrets[opp_id].tolist(), strat_sums[opp_id].tolist(),
+        SCALAR_HERO_PAYOFFS[player_view], SCALAR_OPP_PAYOFFS[player_view],
+        iterations,
+    )
+    regrets[hero_id], strat_sums[hero_id] = rh, sh
+    regrets[opp_id], strat_sums[opp_id] = ro, so
 
-def train_cfr_on_subtree(root_node, iterations=100):
-    for _ in range(iterations):
-        cfr_tree(root_node, [1.0, 1.0])
+def train_cfr_on_subtree_fast(info_key, opp_info_key, player_view, iterations=100,
+                              payoffs=None, root_reach=None):
+    """
+    CFR on the fixed sub-tree, run by the compiled _cfr_iterate over its
+    flattened layout and the nodes' table rows in place (or by the scalar
+    _iter_cfr without Numba).
+    payoffs / root_reach optionally replace the template's single chance
+    sample with a batch of B samples: (B, n_nodes, 2) and (B, 2). Passing only
+    root_reach repeats the template payoffs for every sample; shapes that
+    don't match raise ValueError.
+    Returns the hero's row id.
+    """
+    batched = payoffs is not None or root_reach is not None
+    if batched:
+        player, slot, first_child, n_children, template_payoffs = FLAT_SUBTREES[player_view]
+        if root_reach is not None:
+            root_reach = np.asarray(root_reach, dtype=np.float64)
+        if payoffs is None:
+            n_batch = len(root_reach) if root_reach is not None and root_reach.ndim == 2 else 1
+            payoffs = np.repeat(template_payoffs, n_batch, axis=0)
+        payoffs = np.asarray(payoffs, dtype=np.float64)
+        if payoffs.ndim != 3 or payoffs.shape[1:] != (len(player), 2):
+            raise ValueError(
+                f"payoffs must have shape (B, {len(player)}, 2), got {payoffs.shape}"
+            )
+        if root_reach is None:
+            root_reach = np.ones((len(payoffs), 2))
+        if root_reach.shape != (len(payoffs), 2):
+            raise ValueError(
+                f"root_reach must have shape ({len(payoffs)}, 2), got {root_reach.shape}"
+            )
+
+    # Rows are resolved first: creating a node may reallocate the tables
+    hero_id = get_or_create_cfr_node(info_key)
+    opp_id = get_or_create_cfr_node(opp_info_key)
+    rows = np.array([hero_id, opp_id], dtype=np.int64)
+
+    if batched:
+        _cfr_iterate(
+            REGRETS, STRAT_SUMS, rows, player, slot, first_child, n_children,
+            payoffs, root_reach, iterations,
+        )
+    else:
+        _train_rows(REGRETS, STRAT_SUMS, rows, player_view, iterations)
+    VISITS[rows] += iterations
+    return hero_id
+
+def cfr_iterations_for(info_key):
+    """
+    How many CFR iterations a decision at info_key still needs: the full
+    CFR_ITERATIONS until the info set has been trained CONVERGED_VISITS
+    times, then only a few to keep it ticking over.
+    """
+    node_id = NODE_INDEX.get(info_key)
+    if node_id is not None and VISITS[node_id] >= CONVERGED_VISITS:
+        return CONVERGED_ITERATIONS
+    return CFR_ITERATIONS
 
 ############################################
 # 4) PyPokerEngine Players
@@ -175,6 +478,9 @@ class TreeCFRPlayer(BasePokerPlayer):
         super().__init__()
         self.train_mode = train_mode
         self.uuid = None
+        # Uniform draws for action sampling, refilled in batches
+        self._uniform_buf = RNG.random(UNIFORM_BUFFER_SIZE)
+        self._uniform_pos = 0
 
     def receive_game_start_message(self, game_info):
         self.uuid = self.uuid
@@ -203,69 +509,45 @@ class TreeCFRPlayer(BasePokerPlayer):
                 player_view = i
                 break
 
+        info_key = make_info_key(hole_cards, community_cards, pot_size)
+
         # Build sub-tree
-        root_node = build_subtree(round_state, player_view, hole_cards, community_cards, pot_size)
+        subtree = build_subtree(player_view, info_key, pot_size)
 
-        # Train
+        # Train, then retrieve average strategy from root
         if self.train_mode:
-            train_cfr_on_subtree(root_node, iterations=50)
-
-        # Retrieve average strategy from root
-        hole_str = "-".join(sorted([c[0] for c in hole_cards]))
-        board_str = "-".join([c[0] for c in community_cards])
-        root_info_key = (hole_str, board_str, pot_size)
+            node_id = train_cfr_on_subtree_fast(*subtree, iterations=cfr_iterations_for(info_key))
+        else:
+            node_id = NODE_INDEX.get(info_key)
 
-        if root_info_key not in cfr_nodes:
-            strategy = {"fold":0.33, "call":0.34, "raise":0.33}
+        if node_id is None:
+            strategy = DEFAULT_STRATEGY
         else:
-            node = cfr_nodes[root_info_key]
-            strategy = node.get_average_strategy()
+            strategy = get_average_strategy(node_id)
 
         return self._map_strategy_to_action(valid_actions, strategy)
 
+    def _next_uniform(self):
+        if self._uniform_pos == UNIFORM_BUFFER_SIZE:
+            RNG.random(out=self._uniform_buf)
+            self._uniform_pos = 0
+        r = self._uniform_buf[self._uniform_pos]
+        self._uniform_pos += 1
+        return r
+
     def _map_strategy_to_action(self, valid_actions, strategy):
-        filtered_strat = {}
-        sum_prob = 0.0
-
-        for va in valid_actions:
-            act_type = va["action"]
-            if act_type in ("call", "check"):
-                prob = strategy.get("call", 0.0)
-                filtered_strat[act_type] = prob
-                sum_prob += prob
-            elif act_type == "raise":
-                prob = strategy.get("raise", 0.0)
-                filtered_strat["raise"] = prob
-                sum_prob += prob
-            elif act_type == "fold":
-                prob = strategy.get("fold", 0.0)
-                filtered_strat["fold"] = prob
-                sum_prob += prob
+        probs = np.array([strategy[VALID_ACTION_IDX[va["action"]]] for va in valid_actions])
+        cumulative = np.cumsum(probs)
+        sum_prob = cumulative[-1]
+        r = self._next_uniform()
 
         if sum_prob < 1e-9:
             # fallback
-            choice = random.choice(valid_actions)
+            choice = valid_actions[int(r * len(valid_actions))]
             return self._convert_to_action_amount(choice)
 
-        for k in filtered_strat:
-            filtered_strat[k] /= sum_prob
-
-        r = random.random()
-        cumulative = 0.0
-        for va in valid_actions:
-            act_type = va["action"]
-            if act_type in ("call","check"):
-                prob = filtered_strat.get("call", 0.0)
-            elif act_type == "raise":
-                prob = filtered_strat.get("raise", 0.0)
-            else:
-                prob = filtered_strat.get("fold", 0.0)
-
-            cumulative += prob
-            if r < cumulative:
-                return self._convert_to_action_amount(va)
-
-        return self._convert_to_action_amount(valid_actions[-1])
+        idx = min(int(np.searchsorted(cumulative, r * sum_prob, side="right")), len(probs) - 1)
+        return self._convert_to_action_amount(valid_actions[idx])
 
     def _convert_to_action_amount(self, va):
         act_type = va["action"]
@@ -312,17 +594,123 @@ class RandomPlayer(BasePokerPlayer):
         pass
 
 
+class ObserverPlayer(BasePokerPlayer):
+    """
+    Wraps another player and records the game as structured events in
+    event_log, so callers don't have to capture and parse verbose=1 output:
+      - {"type": "round_start", "round": n}
+      - {"type": "action", "player": name, "action": "call", "amount": 20}
+      - {"type": "round_result", "winners": [name, ...], "stacks": {name: stack}}
+    Every seat receives the same notifications, so wrap only one player.
+    """
+    def __init__(self, player):
+        super().__init__()
+        self.player = player
+        self.event_log = []
+        self._names = {}
+
+    def set_uuid(self, uuid):
+        super().set_uuid(uuid)
+        self.player.set_uuid(uuid)
+
+    def declare_action(self, valid_actions, hole_cards, round_state):
+        return self.player.declare_action(valid_actions, hole_cards, round_state)
+
+    def receive_game_start_message(self, game_info):
+        self._names = {s["uuid"]: s["name"] for s in game_info["seats"]}
+        self.player.receive_game_start_message(game_info)
+
+    def receive_round_start_message(self, round_count, hole_cards, seats):
+        self.event_log.append({"type": "round_start", "round": round_count})
+        self.player.receive_round_start_message(round_count, hole_cards, seats)
+
+    def receive_street_start_message(self, street, round_state):
+        self.player.receive_street_start_message(street, round_state)
+
+    def receive_game_update_message(self, action, round_state):
+        self.event_log.append({
+            "type": "action",
+            "player": self._names.get(action["player_uuid"], action["player_uuid"]),
+            "action": action["action"],
+            "amount": action["amount"],
+        })
+        self.player.receive_game_update_message(action, round_state)
+
+    def receive_round_result_message(self, winners, hand_info, round_state):
+        self.event_log.append({
+            "type": "round_result",
+            "winners": [w["name"] for w in winners],
+            "stacks": {s["name"]: s["stack"] for s in round_state["seats"]},
+        })
+        self.player.receive_round_result_message(winners, hand_info, round_state)
+
+############################################
+# 5) Offline Pre-Training
+############################################
+
+BOARD_SIZES = (0, 3, 4, 5)
+
+def sample_subtrees(num_samples, pot_sizes):
+    """
+    Deals `num_samples` random (hole cards, board, pot) situations and returns
+    their sub-trees, ready for pretrain_cfr.
+    All chance outcomes are drawn from RNG in a few batched calls.
+    """
+    board_sizes = RNG.choice(BOARD_SIZES, size=num_samples).tolist()
+    pots = RNG.choice(np.asarray(pot_sizes), size=num_samples).tolist()
+    # A random permutation of the deck per sample; the first 7 cards are dealt
+    deals = RNG.random((num_samples, len(DECK))).argsort(axis=1)[:, :7].tolist()
+
+    subtrees = []
+    for board_size, pot_size, deal in zip(board_sizes, pots, deals):
+        cards = [DECK[c] for c in deal[:2 + board_size]]
+        info_key = make_info_key(cards[:2], cards[2:], pot_size)
+        subtrees.append(build_subtree(0, info_key, pot_size))
+    return subtrees
+
+def pretrain_cfr(subtrees, iterations=500, max_workers=None):
+    """
+    Runs CFR on many sub-trees in a thread pool, filling the CFR tables ahead
+    of play. Sub-trees are bucketed by their opponent info set: every sub-tree
+    sharing an opponent row is trained by the same worker, so no row is
+    written by two threads at once.
+    """
+    # Allocate every row up front; the tables must not grow while workers
+    # hold views into them.
+    buckets = {}
+    for info_key, opp_info_key, player_view in subtrees:
+        hero_id = get_or_create_cfr_node(info_key)
+        opp_id = get_or_create_cfr_node(opp_info_key)
+        rows = np.array([hero_id, opp_id], dtype=np.int64)
+        buckets.setdefault(opp_id, []).append((rows, player_view))
+
+    regrets, strat_sums, visits = REGRETS, STRAT_SUMS, VISITS
+
+    def train_bucket(bucket):
+        for rows, player_view in bucket:
+            _train_rows(regrets, strat_sums, rows, player_view, iterations)
+            visits[rows] += iterations
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(train_bucket, buckets.values()))
+
+
 ############################################
 # 7) Demo: Running a Game
 ############################################
 
-def demo_run_game(num_rounds=5, train_mode=True):
+def demo_run_game(num_rounds=5, train_mode=True, pretrain_samples=0):
+    small_blind = 10
     config = setup_config(
         max_round=num_rounds,
         initial_stack=1000,
-        small_blind_amount=10
+        small_blind_amount=small_blind
     )
 
+    if pretrain_samples:
+        pot_sizes = range(3 * small_blind, 31 * small_blind, small_blind)
+        pretrain_cfr(sample_subtrees(pretrain_samples, pot_sizes))
+
     config.register_player(name="CFR_BOT", algorithm=TreeCFRPlayer(train_mode=train_mode))
     config.register_player(name="RandBot", algorithm=RandomPlayer())
 
@@ -332,5 +720,5 @@ def demo_run_game(num_rounds=5, train_mode=True):
         print(f"{pl['name']} ended with {pl['stack']}")
 
 if __name__ == "__main__":
-    cfr_nodes = {}
+    reset_cfr_table()
     demo_run_game(num_rounds=10, train_mode=True)
\ No newline at end of file
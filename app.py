@@ -1,10 +1,7 @@
 import streamlit as st
 from pypokerengine.api.game import setup_config, start_poker
-from CFRBot import TreeCFRPlayer, RandomPlayer
+from CFRBot import TreeCFRPlayer, RandomPlayer, ObserverPlayer
 import pandas as pd
-import io
-import sys
-import re
 
 # Title and Description
 st.title("Counterfactual Regret Minimization Poker Bot")
@@ -35,46 +32,32 @@ with tabs[0]:  # Game Tab
         # Set up PyPokerEngine configuration
         config = setup_config(max_round=num_rounds, initial_stack=initial_stack, small_blind_amount=small_blind)
         config.register_player(name="CFR_BOT", algorithm=TreeCFRPlayer(train_mode=True))
-        config.register_player(name="RandBot", algorithm=RandomPlayer())
-
-        # Redirect verbose output to capture logs manually
-        log_capture_string = io.StringIO()
-        sys.stdout = log_capture_string
+        # The observer records structured events while RandBot plays
+        observer = ObserverPlayer(RandomPlayer())
+        config.register_player(name="RandBot", algorithm=observer)
 
         # Start the game
-        try:
-            st.write("Starting game...")
-            game_result = start_poker(config, verbose=1)
-        finally:
-            sys.stdout = sys.__stdout__  # Restore original stdout
-
-        # Process logs into a structured format
-        logs = log_capture_string.getvalue().splitlines()
+        st.write("Starting game...")
+        game_result = start_poker(config, verbose=0)
 
-        # Parse rounds and actions
+        # Group events by round
         rounds = []
         current_round = None
 
-        for line in logs:
-            if "Started the round" in line:
+        for event in observer.event_log:
+            if event["type"] == "round_start":
                 if current_round:
                     rounds.append(current_round)
-                round_number = int(line.split()[-1])
-                current_round = {"Round": round_number, "Actions": []}
-            elif "declared" in line:
-                # Parse player actions
-                parts = line.split()
-                player = parts[0].strip('"')
-                action = parts[2].strip('"')
-                # Extract chips using regex for patterns like "call:20" or "raise:50"
-                chips_match = re.search(r":(\d+)", line)
-                chips = chips_match.group(1) if chips_match else "0"  # Default to 0 for non-betting actions
-                current_round["Actions"].append({"Player": player, "Action": action, "Chips": chips})
-            elif "won the round" in line:
-                # Parse round results
-                winner = line.split("[")[1].split("]")[0]
-                stack_info = line.split("stack = ")[1]
-                current_round["Actions"].append({"Player": winner, "Action": "Won", "Chips": stack_info})
+                current_round = {"Round": event["round"], "Actions": []}
+            elif event["type"] == "action":
+                current_round["Actions"].append(
+                    {"Player": event["player"], "Action": event["action"], "Chips": str(event["amount"])}
+                )
+            elif event["type"] == "round_result":
+                stacks = ", ".join(f"{name}: {stack}" for name, stack in event["stacks"].items())
+                current_round["Actions"].append(
+                    {"Player": ", ".join(event["winners"]), "Action": "Won", "Chips": stacks}
+                )
 
         if current_round:
             rounds.append(current_round)
@@ -99,9 +82,9 @@ with tabs[1]:  # Code Explanation Tab
         st.markdown("""
         - **Core Idea**: CFR minimizes regret over many iterations to approximate an optimal strategy.
         - **Key Components**:
-          - `CFRNode`: Stores regret and strategy sums for decision points.
-          - `TreeNode`: Represents the decision tree structure for the game.
-          - `cfr_tree()`: Recursive forward/backward pass to compute regrets and strategies.
+          - `REGRETS` / `STRAT_SUMS`: Tables of regret and strategy sums, one row per decision point.
+          - `FLAT_SUBTREES`: The fixed decision tree flattened into arrays, built once at import.
+          - `train_cfr_on_subtree_fast()`: Iterative forward/backward pass to compute regrets and strategies.
         """)
 
     with st.expander("Tree-based Game Representation"):
@@ -133,25 +116,28 @@ with tabs[1]:  # Code Explanation Tab
           - Chooses an action based on the average strategy.
         - **RandomPlayer**:
           - A baseline opponent that chooses actions randomly.
+        - **ObserverPlayer**:
+          - Wraps a player and records round starts, actions and results as structured events for the game log.
         """)
 
     with st.expander("Data Structures Used"):
         st.markdown("""
-        - `CFRNode`:
-          - Stores:
-            - `regret_sums`: Tracks regret for each action.
-            - `strategy_sums`: Tracks strategy probabilities over time.
-          - Methods:
-            - `get_strategy()`: Converts regrets to probabilities.
-            - `get_average_strategy()`: Computes the time-averaged strategy.
-
-        - `TreeNode`:
-          - Represents a game state.
+        - CFR tables (struct-of-arrays):
           - Stores:
-            - `current_player`: The player whose turn it is.
-            - `info_key`: Identifies the game state.
-            - `children`: Actions and resulting nodes.
-            - `terminal_payoff`: Final payoffs if the node is terminal.
+            - `NODE_INDEX`: Maps each info_key to a row id.
+            - `REGRETS`: Tracks regret for each action, one row per info set.
+            - `STRAT_SUMS`: Tracks strategy probabilities over time, one row per info set.
+          - Functions:
+            - `get_or_create_cfr_node()`: Returns an info_key's row id, growing the tables when full.
+            - `get_average_strategy()`: Computes the time-averaged strategy of a row.
+
+        - `LEAF_PAYOFFS`:
+          - One `(leaves, 2)` payoff array per hero seat.
+          - Leaf 0 is the hero folding; leaves 1-3 are the opponent's fold/call/raise.
+
+        - `flatten_tree()`:
+          - Lays the tree out breadth-first as parallel arrays (`player`, `slot`, `first_child`, `n_children`, `payoffs`).
+          - Each node's children are contiguous, so CFR walks the tree with index arithmetic instead of recursion.
         """)
 
     with st.expander("Example Workflow"):